@@ -8,9 +8,18 @@ from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 import os
 import json
+import mmap
 from cryptography.fernet import Fernet
 import base64
+import glob
+import tempfile
+import pyarrow as pa
 from pytz import timezone as pytz_timezone
+from bisect import bisect_right
+from itertools import accumulate
+import heapq
+from dateutil.rrule import rrulestr
+from dateutil.relativedelta import relativedelta
 
 # Configuração inicial da página
 st.set_page_config(
@@ -52,11 +61,34 @@ if 'email_config' not in st.session_state:
         'receiver_email': ''
     }
 
+# Função para criar a tabela de tarefas vazia (datas como datetime64, como no backup)
+def empty_tasks():
+    return pd.DataFrame(
+        columns=['Tarefa', 'Descrição', 'Início', 'Fim', 'Responsável', 'Email Responsável', 'Recorrência']
+    ).astype({'Início': 'datetime64[s]', 'Fim': 'datetime64[s]'})
+
+# Função para exibir uma data armazenada (datetime64 ou date) sem o horário
+def format_date(value):
+    return pd.Timestamp(value).date() if pd.notna(value) else ''
+
 # Criando um DataFrame vazio para a organização das tarefas
 if 'tasks' not in st.session_state:
-    st.session_state.tasks = pd.DataFrame(
-        columns=['Tarefa', 'Descrição', 'Início', 'Fim', 'Responsável', 'Email Responsável']
-    )
+    st.session_state.tasks = empty_tasks()
+
+# Frequências disponíveis para tarefas recorrentes (regras RRULE do dateutil)
+RECURRENCE_FREQUENCIES = {
+    'Não se repete': None,
+    'Diária': 'DAILY',
+    'Semanal': 'WEEKLY',
+    'Mensal': 'MONTHLY',
+    'Anual': 'YEARLY'
+}
+
+# Dias da semana no formato RRULE, na ordem de datetime.weekday()
+RRULE_WEEKDAYS = ['MO', 'TU', 'WE', 'TH', 'FR', 'SA', 'SU']
+
+# Horizonte (em dias) para expandir tarefas recorrentes na detecção de conflitos
+CONFLICT_HORIZON_DAYS = 180
 
 # Dicionário para armazenar emails dos responsáveis
 if 'responsaveis_emails' not in st.session_state:
@@ -107,23 +139,399 @@ if 'email_config_loaded' not in st.session_state:
     load_email_config()
     st.session_state.email_config_loaded = True
 
+# Arquivos de backup: CSV (legível) e snapshot binário colunar (carregamento rápido)
+# Cada gravação do snapshot gera um novo arquivo (backup_tarefas.<geração>.bin), para nunca
+# substituir um arquivo que outra sessão ainda mantém mapeado em memória (no Windows isso falha)
+BACKUP_CSV = 'backup_tarefas.csv'
+BACKUP_SNAPSHOT = 'backup_tarefas.bin'
+SNAPSHOT_MAGIC = b'TASKSNP2'
+
+# Codificação de cada coluna no snapshot:
+# 'date' -> array fixo de datas (datetime64[s]), 'dict' -> códigos inteiros + dicionário,
+# 'blob' -> texto concatenado em UTF-8 indexado por offsets
+SNAPSHOT_COLUMNS = {
+    'Tarefa': 'blob',
+    'Descrição': 'blob',
+    'Início': 'date',
+    'Fim': 'date',
+    'Responsável': 'dict',
+    'Email Responsável': 'dict',
+    'Recorrência': 'dict'
+}
+
+# Função para alinhar offsets do snapshot em 8 bytes
+def _align(offset):
+    return (offset + 7) & ~7
+
+# Função para codificar uma lista de textos em um blob UTF-8 com offsets
+def _encode_strings(strings):
+    encoded = [text.encode('utf-8') for text in strings]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([len(data) for data in encoded], dtype=np.int64)
+    return offsets, np.frombuffer(b''.join(encoded), dtype=np.uint8)
+
+# Função para decodificar um blob UTF-8 indexado por offsets (usada só para os dicionários)
+def _decode_strings(offsets, blob):
+    buffer = memoryview(blob)
+    bounds = offsets.tolist()
+    return [str(buffer[a:b], 'utf-8') for a, b in zip(bounds[:-1], bounds[1:])]
+
+# Função para listar as gerações de snapshot existentes, da mais recente para a mais antiga
+def _snapshot_generations(base=BACKUP_SNAPSHOT):
+    root, ext = os.path.splitext(base)
+    generations = []
+    for path in glob.glob(f"{glob.escape(root)}.*{ext}"):
+        generation = path[len(root) + 1:len(path) - len(ext)]
+        if generation.isdigit():
+            generations.append((int(generation), path))
+    return sorted(generations, reverse=True)
+
+# Função para obter o caminho do snapshot mais recente (ou None)
+def latest_snapshot(base=BACKUP_SNAPSHOT):
+    generations = _snapshot_generations(base)
+    return generations[0][1] if generations else None
+
+# Função para ler o backup em CSV convertendo as colunas de data
+def read_tasks_csv(path=BACKUP_CSV):
+    df = pd.read_csv(path)
+    df['Início'] = pd.to_datetime(df['Início'])
+    df['Fim'] = pd.to_datetime(df['Fim'])
+    return df
+
+# Função para gravar as tarefas em uma nova geração do snapshot binário colunar
+def write_snapshot(df, base=BACKUP_SNAPSHOT):
+    columns = {col: kind for col, kind in SNAPSHOT_COLUMNS.items() if col in df.columns}
+    arrays = {}
+
+    for column, kind in columns.items():
+        if kind == 'date':
+            dates = pd.to_datetime(df[column], errors='coerce').values.astype('datetime64[D]')
+            arrays[column] = dates.astype('datetime64[s]').view(np.int64)
+        elif kind == 'dict':
+            values = df[column].astype(object)
+            # Dicionário em ordem alfabética, para que ordenar pelos códigos equivalha a ordenar pelo texto
+            codes, uniques = pd.factorize(values.where(values.isna(), values.astype(str)), sort=True)
+            arrays[f'{column}:codes'] = codes.astype(np.int32)
+            arrays[f'{column}:dict_offsets'], arrays[f'{column}:dict_blob'] = _encode_strings(list(uniques))
+        else:
+            arrays[f'{column}:offsets'], arrays[f'{column}:blob'] = _encode_strings(
+                df[column].astype(object).fillna('').astype(str).tolist()
+            )
+
+    header = {'rows': len(df), 'columns': columns, 'arrays': {}}
+    offset = 0
+    for name, array in arrays.items():
+        header['arrays'][name] = {'dtype': array.dtype.str, 'offset': offset, 'count': len(array)}
+        offset = _align(offset + array.nbytes)
+
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _align(len(SNAPSHOT_MAGIC) + 8 + len(header_bytes))
+
+    generations = _snapshot_generations(base)
+    root, ext = os.path.splitext(base)
+    path = f"{root}.{generations[0][0] + 1 if generations else 1}{ext}"
+
+    # Grava em um arquivo temporário único (duas sessões podem salvar ao mesmo tempo) e renomeia
+    # para o nome novo, que ninguém tem mapeado
+    fd, tmp_path = tempfile.mkstemp(
+        prefix=f"{os.path.basename(root)}.", suffix='.tmp', dir=os.path.dirname(os.path.abspath(base))
+    )
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(SNAPSHOT_MAGIC)
+            f.write(np.uint64(len(header_bytes)).tobytes())
+            f.write(header_bytes)
+            for name, array in arrays.items():
+                f.seek(data_start + header['arrays'][name]['offset'])
+                f.write(np.ascontiguousarray(array).tobytes())
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+
+    # Remove as gerações antigas; se alguma ainda estiver mapeada, fica para a próxima gravação
+    for _, old_path in generations:
+        try:
+            os.remove(old_path)
+        except OSError:
+            pass
+    return path
+
+# Função para abrir o snapshot via mapeamento de memória
+# O mapeamento é compartilhado entre as sessões do processo (e as páginas entre processos,
+# pelo cache do sistema operacional). Inode, data de modificação e tamanho entram na chave do
+# cache para que um arquivo recriado com o mesmo nome (ex.: numeração reiniciada) seja remapeado.
+@st.cache_resource(show_spinner=False, max_entries=1)
+def open_snapshot(path, inode, mtime_ns, size):
+    with open(path, 'rb') as f:
+        mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if mapped[:len(SNAPSHOT_MAGIC)] != SNAPSHOT_MAGIC:
+        raise ValueError(f"Arquivo de snapshot inválido: {path}")
+
+    header_start = len(SNAPSHOT_MAGIC) + 8
+    header_len = int(np.frombuffer(mapped, dtype=np.uint64, count=1, offset=len(SNAPSHOT_MAGIC))[0])
+    header = json.loads(mapped[header_start:header_start + header_len].decode('utf-8'))
+    data_start = _align(header_start + header_len)
+
+    arrays = {
+        name: np.frombuffer(
+            mapped, dtype=np.dtype(spec['dtype']), count=spec['count'], offset=data_start + spec['offset']
+        )
+        for name, spec in header['arrays'].items()
+    }
+    return header, arrays
+
+# Função para carregar as tarefas a partir do snapshot binário mais recente
+# As colunas apontam para o arquivo mapeado, sem criar um objeto Python por linha:
+# datas como visão datetime64, dicionários como Categorical e textos como strings do Arrow
+def read_snapshot(base=BACKUP_SNAPSHOT):
+    path = latest_snapshot(base)
+    if path is None:
+        raise FileNotFoundError(base)
+
+    stat = os.stat(path)
+    header, arrays = open_snapshot(path, stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    data = {}
+
+    for column, kind in header['columns'].items():
+        if kind == 'date':
+            data[column] = arrays[column].view('datetime64[s]')
+        elif kind == 'dict':
+            # O código -1 representa valor ausente
+            categories = _decode_strings(arrays[f'{column}:dict_offsets'], arrays[f'{column}:dict_blob'])
+            data[column] = pd.Categorical.from_codes(arrays[f'{column}:codes'], categories=categories)
+        else:
+            strings = pa.LargeStringArray.from_buffers(
+                header['rows'],
+                pa.py_buffer(arrays[f'{column}:offsets']),
+                pa.py_buffer(arrays[f'{column}:blob'])
+            )
+            data[column] = pd.arrays.ArrowExtensionArray(strings)
+
+    # O dicionário já segue a ordem das colunas do cabeçalho
+    return pd.DataFrame(data, copy=False)
+
+# Funções para converter entre o backup em CSV e o snapshot binário
+def csv_to_snapshot(csv_path=BACKUP_CSV, snapshot_base=BACKUP_SNAPSHOT):
+    df = read_tasks_csv(csv_path)
+    write_snapshot(df, snapshot_base)
+    return df
+
+def snapshot_to_csv(snapshot_base=BACKUP_SNAPSHOT, csv_path=BACKUP_CSV):
+    df = read_snapshot(snapshot_base)
+    df.to_csv(csv_path, index=False)
+    return df
+
+# Função para verificar se o snapshot está atualizado em relação ao CSV
+def snapshot_is_current(snapshot_base=BACKUP_SNAPSHOT, csv_path=BACKUP_CSV):
+    snapshot_path = latest_snapshot(snapshot_base)
+    if snapshot_path is None:
+        return False
+    return not os.path.exists(csv_path) or os.path.getmtime(snapshot_path) >= os.path.getmtime(csv_path)
+
 # Carregar backup de tarefas se existir
+# Usa o snapshot binário quando ele está atualizado; caso contrário (ou se ele estiver
+# corrompido) lê o CSV e regenera o snapshot
 if 'data_loaded' not in st.session_state:
+    backup_df = None
+    if snapshot_is_current():
+        try:
+            backup_df = read_snapshot()
+        except Exception as e:
+            st.warning(f"⚠️ Snapshot de tarefas inválido, carregando o CSV: {str(e)}")
+
     try:
-        backup_df = pd.read_csv('backup_tarefas.csv')
+        if backup_df is None:
+            backup_df = csv_to_snapshot()
         if not backup_df.empty and all(col in backup_df.columns for col in ['Tarefa', 'Descrição', 'Início', 'Fim', 'Responsável']):
-            # Converter strings de data para objetos datetime
-            backup_df['Início'] = pd.to_datetime(backup_df['Início']).dt.date
-            backup_df['Fim'] = pd.to_datetime(backup_df['Fim']).dt.date
             st.session_state.tasks = backup_df
-            st.session_state.data_loaded = True
-    except:
+            st.session_state.saved_tasks = backup_df
         st.session_state.data_loaded = True
+    except FileNotFoundError:
+        # Ainda não existe backup
+        st.session_state.data_loaded = True
+    except Exception as e:
+        # Não marca como carregado, para que save_backup não sobrescreva o backup existente
+        st.error(f"Erro ao carregar backup de tarefas: {str(e)}")
 
 # Função para salvar backup de tarefas
+# Só grava quando as tarefas mudaram (a tabela é sempre substituída, nunca alterada no lugar)
 def save_backup():
-    if not st.session_state.tasks.empty:
-        st.session_state.tasks.to_csv('backup_tarefas.csv', index=False)
+    if not st.session_state.get('data_loaded'):
+        return
+    if not st.session_state.tasks.empty and st.session_state.get('saved_tasks') is not st.session_state.tasks:
+        st.session_state.tasks.to_csv(BACKUP_CSV, index=False)
+        write_snapshot(st.session_state.tasks)
+        st.session_state.saved_tasks = st.session_state.tasks
+
+# Função para montar a regra de recorrência (formato RRULE) de uma tarefa
+def build_recurrence_rule(frequency, until=None):
+    freq = RECURRENCE_FREQUENCIES.get(frequency)
+    if not freq:
+        return ""
+    rule = f"FREQ={freq}"
+    if until:
+        rule += f";UNTIL={until.strftime('%Y%m%d')}"
+    return rule
+
+# Função para interpretar a regra de recorrência (uma linha RRULE) em um dicionário de partes
+def parse_recurrence_rule(rule_text):
+    text = str(rule_text).strip()
+    if text.upper().startswith('RRULE:'):
+        text = text[len('RRULE:'):]
+
+    parts = {}
+    for part in text.split(';'):
+        key, sep, value = part.partition('=')
+        if not sep or not key.strip() or not value.strip():
+            raise ValueError(f"Regra de recorrência inválida: {rule_text}")
+        parts[key.strip().upper()] = value.strip().upper()
+
+    if parts.get('FREQ') not in ('DAILY', 'WEEKLY', 'MONTHLY', 'YEARLY'):
+        raise ValueError(f"Frequência de recorrência não suportada: {rule_text}")
+
+    # INTERVAL=0 faria o dateutil entrar em laço infinito; COUNT=0 geraria uma série vazia
+    for key in ('INTERVAL', 'COUNT'):
+        if key in parts and (not parts[key].isdigit() or int(parts[key]) < 1):
+            raise ValueError(f"{key} deve ser um inteiro positivo: {rule_text}")
+    return parts
+
+# Função para montar a regra com o início da série adiantado até o período que contém a data alvo
+# Assim as ocorrências anteriores à janela consultada não são percorridas: DAILY/WEEKLY avançam
+# por aritmética de dias e MONTHLY/YEARLY com relativedelta. Retorna None se a série já acabou.
+def _fast_forward_rule(parts, dtstart, target):
+    freq = parts['FREQ']
+    interval = int(parts.get('INTERVAL', 1))
+    count = int(parts['COUNT']) if 'COUNT' in parts else None
+    has_by_parts = any(key.startswith('BY') for key in parts)
+    # Sem BYxxx de dia, o dateutil deduz o dia (da semana/do mês) a partir do início da série
+    implicit_day = not any(key in parts for key in ('BYWEEKNO', 'BYYEARDAY', 'BYMONTHDAY', 'BYDAY', 'BYEASTER'))
+
+    # Com COUNT, as ocorrências puladas só podem ser descontadas se houver uma por período
+    one_per_period = not has_by_parts and (
+        freq in ('DAILY', 'WEEKLY') or
+        (freq == 'MONTHLY' and dtstart.day <= 28) or
+        (freq == 'YEARLY' and (dtstart.month, dtstart.day) != (2, 29))
+    )
+
+    periods = 0
+    if target > dtstart and 'BYWEEKNO' not in parts and (count is None or one_per_period):
+        if freq == 'DAILY':
+            periods = (target - dtstart).days // interval
+        elif freq == 'WEEKLY':
+            periods = (target - dtstart).days // 7 // interval
+        else:
+            months = (target.year - dtstart.year) * 12 + target.month - dtstart.month
+            periods = months // (interval * (12 if freq == 'YEARLY' else 1))
+
+    if periods > 0:
+        parts = dict(parts)
+        if freq == 'DAILY':
+            new_start = dtstart + timedelta(days=periods * interval)
+        elif freq == 'WEEKLY':
+            if implicit_day:
+                parts['BYDAY'] = RRULE_WEEKDAYS[dtstart.weekday()]
+            # Volta ao início da semana (WKST) para manter os dias do BYDAY anteriores ao dia do início
+            new_start = dtstart + timedelta(weeks=periods * interval)
+            week_start = RRULE_WEEKDAYS.index(parts.get('WKST', 'MO'))
+            new_start -= timedelta(days=(new_start.weekday() - week_start) % 7)
+        else:
+            if implicit_day:
+                parts['BYMONTHDAY'] = str(dtstart.day)
+            if freq == 'MONTHLY':
+                new_start = (dtstart + relativedelta(months=periods * interval)).replace(day=1)
+            else:
+                if implicit_day and 'BYMONTH' not in parts:
+                    parts['BYMONTH'] = str(dtstart.month)
+                new_start = (dtstart + relativedelta(years=periods * interval)).replace(month=1, day=1)
+
+        if count is not None:
+            if count <= periods:
+                return None
+            parts['COUNT'] = str(count - periods)
+        dtstart = new_start
+
+    return rrulestr(';'.join(f"{key}={value}" for key, value in parts.items()), dtstart=dtstart)
+
+# Função para gerar as ocorrências (início, fim) de uma série que se sobrepõem à janela
+def series_occurrences(rule_text, dtstart, duration, window_start, window_end):
+    dtstart = pd.Timestamp(dtstart).to_pydatetime()
+    duration = pd.Timedelta(duration).to_pytimedelta()
+    # Ocorrências que começaram antes da janela mas ainda estão em andamento também contam
+    target = pd.Timestamp(window_start).to_pydatetime() - duration
+
+    rule = _fast_forward_rule(parse_recurrence_rule(rule_text), dtstart, target)
+    if rule is None:
+        return []
+    return [
+        (occurrence, occurrence + duration)
+        for occurrence in rule.between(target, pd.Timestamp(window_end).to_pydatetime(), inc=True)
+    ]
+
+# Função para validar uma regra de recorrência; retorna a mensagem de erro ou None
+def validate_recurrence_rule(rule_text, start=None):
+    start = pd.Timestamp(start) if pd.notna(start) else pd.Timestamp(datetime.now(TIMEZONE).date())
+    try:
+        series_occurrences(rule_text, start, timedelta(0), start, start)
+    except (ValueError, TypeError) as e:
+        return str(e)
+    return None
+
+# Função para identificar as linhas que são séries recorrentes
+def recurring_mask(tasks):
+    if 'Recorrência' not in tasks.columns:
+        return pd.Series(False, index=tasks.index)
+    return tasks['Recorrência'].astype(object).fillna('').astype(str).str.strip() != ''
+
+# Função para expandir as ocorrências das tarefas dentro de uma janela de datas
+# Cada tarefa recorrente é guardada em uma única linha (a primeira ocorrência mais a regra);
+# as ocorrências são geradas sob demanda e apenas para a janela consultada.
+def expand_occurrences(tasks, window_start, window_end):
+    if tasks.empty:
+        return tasks
+
+    inicio = pd.to_datetime(tasks['Início'], errors='coerce')
+    fim = pd.to_datetime(tasks['Fim'], errors='coerce')
+    window_start = pd.Timestamp(window_start)
+    window_end = pd.Timestamp(window_end)
+    recurring = recurring_mask(tasks)
+
+    occurrences = []
+    occurrence_index = []
+    invalid_rules = []
+    for idx in tasks.index[recurring & inicio.notna() & fim.notna()]:
+        try:
+            spans = series_occurrences(
+                tasks.at[idx, 'Recorrência'], inicio[idx], fim[idx] - inicio[idx], window_start, window_end
+            )
+        except (ValueError, TypeError):
+            # Regra inválida: a linha armazenada é tratada como uma tarefa simples
+            invalid_rules.append(idx)
+            continue
+
+        for start, end in spans:
+            task = tasks.loc[idx].to_dict()
+            task['Início'] = start.date()
+            task['Fim'] = end.date()
+            occurrences.append(task)
+            occurrence_index.append(idx)
+
+    # Tarefas simples: mantém apenas as que se sobrepõem à janela
+    single = ~recurring | tasks.index.isin(invalid_rules)
+    in_window = single & (inicio <= window_end) & (fim >= window_start)
+    # Datas convertidas para datetime.date apenas nas linhas da janela
+    single_tasks = tasks[in_window].assign(**{
+        'Início': inicio[in_window].dt.date,
+        'Fim': fim[in_window].dt.date
+    })
+
+    if not occurrences:
+        return single_tasks
+
+    return pd.concat(
+        [single_tasks, pd.DataFrame(occurrences, index=occurrence_index)]
+    )
 
 # Função para enviar email de lembrete
 def send_reminder_email(task, task_description, date, receiver_email):
@@ -209,7 +617,8 @@ def check_and_send_reminders():
     emails_sent = 0
     errors = 0
     
-    for idx, task in st.session_state.tasks.iterrows():
+    # Só as ocorrências de hoje são geradas para as tarefas recorrentes
+    for idx, task in expand_occurrences(st.session_state.tasks, now, now).iterrows():
         try:
             if task['Início'] <= now <= task['Fim']:
                 last_sent_key = f"último_lembrete_{idx}"
@@ -277,6 +686,235 @@ def check_daily_reminders():
     
     return False
 
+# Função para calcular a carga de trabalho (tarefas simultâneas) por responsável e por dia
+# Usa uma varredura vetorizada: cada tarefa gera um evento +1 no início e -1 no dia
+# seguinte ao fim; a soma acumulada ao longo dos dias dá o número de tarefas ativas.
+# Se uma janela for informada, as tarefas são recortadas a ela antes da varredura, para
+# que a grade cubra apenas o período do gráfico. O resultado fica em cache até que as
+# tarefas ou a janela mudem.
+@st.cache_data(show_spinner=False)
+def compute_workload(tasks, window_start=None, window_end=None):
+    inicio = pd.to_datetime(tasks['Início'], errors='coerce').values.astype('datetime64[D]')
+    fim = pd.to_datetime(tasks['Fim'], errors='coerce').values.astype('datetime64[D]')
+    responsavel = tasks['Responsável'].astype(object).fillna('').astype(str).values
+
+    # Ignora tarefas sem datas válidas ou com fim anterior ao início
+    valid = ~np.isnat(inicio) & ~np.isnat(fim)
+    if window_start is not None:
+        inicio = np.maximum(inicio, np.datetime64(window_start, 'D'))
+    if window_end is not None:
+        fim = np.minimum(fim, np.datetime64(window_end, 'D'))
+    valid[valid] = fim[valid] >= inicio[valid]
+    if not valid.any():
+        return [], None, np.zeros((0, 0), dtype=np.int32)
+
+    inicio, fim, responsavel = inicio[valid], fim[valid], responsavel[valid]
+    owners, owner_codes = np.unique(responsavel, return_inverse=True)
+
+    first_day = inicio.min()
+    n_days = int((fim.max() - first_day).astype(np.int64)) + 1
+    start_idx = (inicio - first_day).astype(np.int64)
+    end_idx = (fim - first_day).astype(np.int64) + 1
+
+    # Eventos +1/-1 em uma grade achatada (responsável x dia), com uma coluna extra para o fim
+    width = n_days + 1
+    events = np.bincount(owner_codes * width + start_idx, minlength=len(owners) * width)
+    events -= np.bincount(owner_codes * width + end_idx, minlength=len(owners) * width)
+    workload = np.cumsum(events.reshape(len(owners), width), axis=1)[:, :n_days]
+
+    return owners.tolist(), first_day, workload.astype(np.int32)
+
+# Função para detectar conflitos de agenda (tarefas sobrepostas do mesmo responsável)
+# Ordena as tarefas de cada responsável pela data de início e faz uma única varredura,
+# mantendo um heap das tarefas em aberto ordenado pela data de fim, em vez de comparar
+# todos os pares: O(n log n + k), sendo k o número de conflitos.
+@st.cache_data(show_spinner=False)
+def find_conflicts(tasks):
+    df = pd.DataFrame({
+        'Linha': tasks.index.values,
+        'Tarefa': tasks['Tarefa'].values,
+        'Responsável': tasks['Responsável'].astype(object).fillna('').astype(str).values,
+        'Início': pd.to_datetime(tasks['Início'], errors='coerce').values,
+        'Fim': pd.to_datetime(tasks['Fim'], errors='coerce').values
+    })
+    df = df[(df['Responsável'] != '') & df['Início'].notna() & df['Fim'].notna()]
+    df = df.sort_values(['Responsável', 'Início'], kind='mergesort')
+
+    conflicts = []
+    current_owner = None
+    open_tasks = []
+
+    for position, (linha, tarefa, responsavel, inicio, fim) in enumerate(df.itertuples(index=False, name=None)):
+        if responsavel != current_owner:
+            current_owner = responsavel
+            open_tasks = []
+
+        # Remove as tarefas que terminaram antes do início da atual
+        while open_tasks and open_tasks[0][0] < inicio:
+            heapq.heappop(open_tasks)
+
+        # Todas as tarefas ainda em aberto se sobrepõem à atual
+        # (exceto ocorrências da mesma série recorrente, que vêm da mesma linha)
+        for open_end, _, open_task, open_linha in open_tasks:
+            if open_linha != linha:
+                conflicts.append([
+                    responsavel, tarefa, open_task, inicio.date(), min(fim, open_end).date()
+                ])
+
+        heapq.heappush(open_tasks, (fim, position, tarefa, linha))
+
+    return pd.DataFrame(
+        conflicts,
+        columns=['Responsável', 'Tarefa', 'Conflita com', 'Início do Conflito', 'Fim do Conflito']
+    )
+
+# Função para montar as tarefas usadas na detecção de conflitos
+# As séries recorrentes são expandidas apenas dentro de um horizonte a partir de hoje
+def conflict_candidates(tasks):
+    today = datetime.now(TIMEZONE).date()
+    recurring = recurring_mask(tasks)
+    series = expand_occurrences(tasks[recurring], today, today + timedelta(days=CONFLICT_HORIZON_DAYS))
+    return pd.concat([tasks[~recurring], series])
+
+# Função para montar o índice de intervalos por responsável, ordenado por data de início
+# Guarda também o máximo acumulado das datas de fim, para encerrar a busca assim que
+# nenhuma tarefa anterior puder se sobrepor à consultada
+def build_owner_index(tasks):
+    inicio = pd.to_datetime(tasks['Início'], errors='coerce')
+    fim = pd.to_datetime(tasks['Fim'], errors='coerce')
+    valid = inicio.notna() & fim.notna()
+
+    # Séries recorrentes (com regra válida) ficam separadas e são expandidas na consulta
+    if 'Recorrência' in tasks.columns:
+        rules = tasks['Recorrência'].astype(object).fillna('').astype(str)
+    else:
+        rules = pd.Series('', index=tasks.index)
+
+    # Linhas com regra inválida entram como tarefas simples, como em expand_occurrences
+    series = recurring_mask(tasks) & valid
+    for idx in tasks.index[series]:
+        if validate_recurrence_rule(rules[idx], inicio[idx]) is not None:
+            series[idx] = False
+
+    intervals_by_owner = {}
+    series_by_owner = {}
+    for tarefa, responsavel, rule, is_series, start, end in zip(
+        tasks['Tarefa'][valid], tasks['Responsável'][valid], rules[valid], series[valid],
+        inicio[valid].dt.date, fim[valid].dt.date
+    ):
+        if is_series:
+            series_by_owner.setdefault(responsavel, []).append((rule, start, end, tarefa))
+        else:
+            intervals_by_owner.setdefault(responsavel, []).append((start, end, tarefa))
+
+    index = {}
+    for owner in set(intervals_by_owner) | set(series_by_owner):
+        intervals = sorted(intervals_by_owner.get(owner, []), key=lambda interval: interval[0])
+        index[owner] = {
+            'starts': [interval[0] for interval in intervals],
+            'intervals': intervals,
+            'max_ends': list(accumulate((interval[1] for interval in intervals), max)),
+            'series': series_by_owner.get(owner, [])
+        }
+    return index
+
+# Função para obter o índice de intervalos (recriado apenas quando as tarefas são alteradas)
+def get_owner_index():
+    if 'owner_index' not in st.session_state:
+        st.session_state.owner_index = build_owner_index(st.session_state.tasks)
+    return st.session_state.owner_index
+
+# Função para descartar o índice de intervalos após edições em massa
+def invalidate_owner_index():
+    st.session_state.pop('owner_index', None)
+
+# Função para verificar se dois conjuntos de intervalos, ordenados pelo início, se sobrepõem
+def _spans_overlap(spans_a, spans_b):
+    i = j = 0
+    while i < len(spans_a) and j < len(spans_b):
+        if spans_a[i][0] <= spans_b[j][1] and spans_b[j][0] <= spans_a[i][1]:
+            return True
+        # O intervalo que termina primeiro não pode se sobrepor aos próximos do outro conjunto
+        if spans_a[i][1] < spans_b[j][1]:
+            i += 1
+        else:
+            j += 1
+    return False
+
+# Função para verificar se uma nova tarefa conflita com as tarefas existentes do responsável
+# O índice é montado aqui, antes de a nova tarefa ser incluída em st.session_state.tasks
+# Uma nova tarefa recorrente é verificada em cada ocorrência dentro do horizonte de conflitos
+def check_new_task_conflicts(owner, start_date, end_date, rule=''):
+    index = get_owner_index()
+    entry = index.get(owner) if owner else None
+    if not entry:
+        return []
+
+    if rule:
+        # Mesma janela de conflict_candidates: a partir de hoje (ou do início da série, se futuro)
+        horizon_start = max(start_date, datetime.now(TIMEZONE).date())
+        horizon_end = horizon_start + timedelta(days=CONFLICT_HORIZON_DAYS)
+        new_spans = [
+            (start.date(), end.date())
+            for start, end in series_occurrences(rule, start_date, end_date - start_date, horizon_start, horizon_end)
+        ]
+    else:
+        new_spans = [(start_date, end_date)]
+
+    intervals, max_ends = entry['intervals'], entry['max_ends']
+    conflicts = []
+
+    for span_start, span_end in new_spans:
+        # Só as tarefas que começam até o fim da nova tarefa podem se sobrepor a ela; percorre
+        # de trás para frente e para quando nenhuma tarefa anterior termina após o início da nova
+        found = []
+        i = bisect_right(entry['starts'], span_end) - 1
+        while i >= 0 and max_ends[i] >= span_start:
+            start, end, tarefa = intervals[i]
+            if end >= span_start:
+                found.append(tarefa)
+            i -= 1
+        conflicts.extend(reversed(found))
+
+    # Séries recorrentes do responsável: expande só o trecho coberto pela nova tarefa
+    if new_spans:
+        first_start = new_spans[0][0]
+        last_end = max(end for _, end in new_spans)
+        for series_rule, series_start, series_end, tarefa in entry['series']:
+            series_spans = [
+                (start.date(), end.date())
+                for start, end in series_occurrences(
+                    series_rule, series_start, series_end - series_start, first_start, last_end
+                )
+            ]
+            if _spans_overlap(new_spans, series_spans):
+                conflicts.append(tarefa)
+
+    return list(dict.fromkeys(conflicts))
+
+# Função para registrar uma nova tarefa no índice de intervalos sem reconstruí-lo
+def register_task_interval(owner, start_date, end_date, task_name, rule=''):
+    entry = get_owner_index().setdefault(
+        owner, {'starts': [], 'intervals': [], 'max_ends': [], 'series': []}
+    )
+    if rule:
+        entry['series'].append((rule, start_date, end_date, task_name))
+        return
+
+    starts, intervals, max_ends = entry['starts'], entry['intervals'], entry['max_ends']
+
+    pos = bisect_right(starts, start_date)
+    starts.insert(pos, start_date)
+    intervals.insert(pos, (start_date, end_date, task_name))
+    max_ends.insert(pos, max(max_ends[pos - 1], end_date) if pos else end_date)
+
+    # Atualiza o máximo acumulado das tarefas seguintes (em geral nenhuma, pois novas
+    # tarefas costumam entrar no fim); a lista é crescente, então basta parar no primeiro maior
+    for j in range(pos + 1, len(max_ends)):
+        if max_ends[j] >= end_date:
+            break
+        max_ends[j] = end_date
+
 # Criação de abas para melhor organização
 tab1, tab2, tab3, tab4 = st.tabs(["📊 Gráfico de Gantt", "📝 Gerenciar Tarefas", "📧 Lembretes", "⚙️ Configurações"])
 
@@ -405,7 +1043,7 @@ with tab3:
     st.subheader("Tarefas com Lembretes Ativos")
     
     now = datetime.now(TIMEZONE).date()
-    active_tasks = st.session_state.tasks[(st.session_state.tasks['Início'] <= now) & (now <= st.session_state.tasks['Fim'])]
+    active_tasks = expand_occurrences(st.session_state.tasks, now, now)
     
     if not active_tasks.empty:
         for i, task in active_tasks.iterrows():
@@ -466,6 +1104,17 @@ with tab2:
             'Email do Responsável (opcional)',
             help="Se não preenchido, usará o email cadastrado na aba Lembretes ou o email padrão."
         )
+
+        # Recorrência: a tarefa é salva uma única vez e as ocorrências são geradas sob demanda
+        col1, col2 = st.columns(2)
+        with col1:
+            recurrence_frequency = st.selectbox('Recorrência', list(RECURRENCE_FREQUENCIES))
+        with col2:
+            recurrence_until = st.date_input(
+                'Repetir até (opcional)',
+                value=None,
+                help="Se não preenchido, a tarefa se repete indefinidamente."
+            )
         
         submitted = st.form_submit_button("Adicionar Tarefa")
         
@@ -475,12 +1124,23 @@ with tab2:
                 st.error("⚠️ Data final não pode ser anterior à data de início!")
             elif not task_name:
                 st.error("⚠️ Nome da tarefa não pode estar vazio!")
+            elif recurrence_until and recurrence_until < start_date:
+                st.error("⚠️ Data final da recorrência não pode ser anterior à data de início!")
             else:
-                new_task = pd.DataFrame([[task_name, task_description, start_date, end_date, owner, owner_email]],
-                                       columns=['Tarefa', 'Descrição', 'Início', 'Fim', 'Responsável', 'Email Responsável'])
+                recurrence_rule = build_recurrence_rule(recurrence_frequency, recurrence_until)
+
+                # Verifica conflitos apenas contra as tarefas do mesmo responsável
+                conflicting_tasks = check_new_task_conflicts(owner, start_date, end_date, recurrence_rule)
+
+                new_task = pd.DataFrame([[task_name, task_description, pd.Timestamp(start_date), pd.Timestamp(end_date), owner, owner_email, recurrence_rule]],
+                                       columns=['Tarefa', 'Descrição', 'Início', 'Fim', 'Responsável', 'Email Responsável', 'Recorrência'])
                 st.session_state.tasks = pd.concat([st.session_state.tasks, new_task], ignore_index=True)
+                register_task_interval(owner, start_date, end_date, task_name, recurrence_rule)
                 save_backup()
                 st.success(f"✅ Tarefa '{task_name}' adicionada com sucesso!")
+
+                if conflicting_tasks:
+                    st.warning(f"⚠️ {owner} já tem tarefas nesse período: {', '.join(conflicting_tasks)}")
     
     # Gerenciamento de tarefas existentes
     st.header('Tarefas Existentes')
@@ -500,7 +1160,11 @@ with tab2:
             search_term = st.text_input("Pesquisar tarefa", "")
 
         # Aplicar filtros
-        filtered_df = st.session_state.tasks.copy()
+        # Colunas do snapshot (Categorical/Arrow) viram texto comum para filtros e edição
+        filtered_df = st.session_state.tasks.astype({
+            col: object for col, dtype in st.session_state.tasks.dtypes.items()
+            if isinstance(dtype, (pd.CategoricalDtype, pd.ArrowDtype))
+        })
 
         if filter_responsible:
             filtered_df = filtered_df[filtered_df['Responsável'].isin(filter_responsible)]
@@ -517,14 +1181,15 @@ with tab2:
             cols = st.columns([2, 3, 2, 2, 2, 3, 1])
             cols[0].write(filtered_df.iloc[i]['Tarefa'])
             cols[1].write(filtered_df.iloc[i]['Descrição'])
-            cols[2].write(filtered_df.iloc[i]['Início'])
-            cols[3].write(filtered_df.iloc[i]['Fim'])
+            cols[2].write(format_date(filtered_df.iloc[i]['Início']))
+            cols[3].write(format_date(filtered_df.iloc[i]['Fim']))
             cols[4].write(filtered_df.iloc[i]['Responsável'])
             cols[5].write(filtered_df.iloc[i].get('Email Responsável', ''))
 
             if cols[6].button("❌", key=f"delete_{i}"):
                 task_to_remove = filtered_df.iloc[i]['Tarefa']
                 st.session_state.tasks = st.session_state.tasks[st.session_state.tasks['Tarefa'] != task_to_remove]
+                invalidate_owner_index()
                 save_backup()
                 st.rerun()
 
@@ -539,7 +1204,11 @@ with tab2:
                 "Início": st.column_config.DateColumn("Início"),
                 "Fim": st.column_config.DateColumn("Fim"),
                 "Responsável": st.column_config.TextColumn("Responsável"),
-                "Email Responsável": st.column_config.TextColumn("Email Responsável")
+                "Email Responsável": st.column_config.TextColumn("Email Responsável"),
+                "Recorrência": st.column_config.TextColumn(
+                    "Recorrência",
+                    help="Regra RRULE (ex.: FREQ=WEEKLY;UNTIL=20251231). Deixe vazio para tarefas sem repetição."
+                )
             },
             hide_index=True,
             num_rows="dynamic",
@@ -547,17 +1216,41 @@ with tab2:
         )
         
         if st.button("Salvar Alterações"):
-            st.session_state.tasks = edited_df
-            save_backup()
-            st.success("✅ Alterações salvas com sucesso!")
+            # Valida as regras de recorrência antes de salvar
+            invalid_rules = []
+            for _, row in edited_df[recurring_mask(edited_df)].iterrows():
+                error = validate_recurrence_rule(row['Recorrência'], row['Início'])
+                if error:
+                    invalid_rules.append(f"'{row['Tarefa']}': {error}")
+
+            if invalid_rules:
+                st.error("⚠️ Regras de recorrência inválidas (ex.: FREQ=WEEKLY;UNTIL=20251231): " + "; ".join(invalid_rules))
+            else:
+                st.session_state.tasks = edited_df
+                invalidate_owner_index()
+                save_backup()
+                st.success("✅ Alterações salvas com sucesso!")
+
+                edited_conflicts = find_conflicts(conflict_candidates(edited_df))
+                if not edited_conflicts.empty:
+                    st.warning(f"⚠️ As alterações deixaram {len(edited_conflicts)} conflito(s) de agenda. Veja a lista abaixo.")
         
+        # Lista de conflitos de agenda por responsável
+        st.subheader("Conflitos de Agenda")
+        conflicts_df = find_conflicts(conflict_candidates(st.session_state.tasks))
+
+        if conflicts_df.empty:
+            st.info("Nenhum responsável possui tarefas sobrepostas.")
+        else:
+            st.warning(f"⚠️ {len(conflicts_df)} conflito(s) encontrado(s).")
+            st.dataframe(conflicts_df, hide_index=True, use_container_width=True)
+
         # Botão para limpar todas as tarefas
         if st.button('Limpar Todas as Tarefas'):
             confirm = st.checkbox('⚠️ Confirma a exclusão de TODAS as tarefas? Esta ação não pode ser desfeita!')
             if confirm:
-                st.session_state.tasks = pd.DataFrame(
-                    columns=['Tarefa', 'Descrição', 'Início', 'Fim', 'Responsável', 'Email Responsável']
-                )
+                st.session_state.tasks = empty_tasks()
+                invalidate_owner_index()
                 save_backup()
                 st.success('🗑️ Todas as tarefas foram removidas!')
 
@@ -586,39 +1279,109 @@ with tab1:
                 ["Responsável", "Período"]
             )
         
-        # Ordenar o DataFrame
-        df_sorted = st.session_state.tasks.sort_values(by=sort_option)
-        
-        # Definir a coluna de cores
-        color_by = "Responsável" if color_option == "Responsável" else None
-        
-        # Criando gráfico com a Plotly
-        fig = px.timeline(
-            df_sorted,
-            x_start='Início',
-            x_end='Fim',
-            y='Tarefa',
-            color=color_by,
-            hover_data=['Descrição'],
-            title='Linha de Tempo de Tarefas'
-        )
+        # Janela do gráfico: as ocorrências das tarefas recorrentes são geradas apenas para ela
+        # Com tarefas recorrentes, o padrão é um período próximo de hoje, para limitar a expansão
+        today = datetime.now(TIMEZONE).date()
+        if recurring_mask(st.session_state.tasks).any():
+            window_start = today - timedelta(days=30)
+            window_end = today + timedelta(days=90)
+        else:
+            stored_start = pd.to_datetime(st.session_state.tasks['Início'], errors='coerce').min()
+            stored_end = pd.to_datetime(st.session_state.tasks['Fim'], errors='coerce').max()
+            window_start = stored_start.date() if pd.notna(stored_start) else today
+            window_end = stored_end.date() if pd.notna(stored_end) else today
 
-        # Personalizando o layout
-        fig.update_yaxes(autorange='reversed')
-        fig.update_layout(
-            height=600,
-            xaxis_title='Período',
-            yaxis_title='Tarefas',
-            hovermode='closest',
-            bargap=0.2,
-            bargroupgap=0.1
+        gantt_range = st.date_input(
+            "Período do gráfico",
+            value=(window_start, window_end),
+            key="gantt_range"
         )
 
-        # Atualizando o template para barras mais finas
-        fig.update_traces(width=bar_thickness)
+        # Durante a seleção o intervalo pode vir incompleto
+        if isinstance(gantt_range, tuple) and len(gantt_range) == 2:
+            window_start, window_end = gantt_range
 
-        st.plotly_chart(fig, use_container_width=True)
+        gantt_df = expand_occurrences(st.session_state.tasks, window_start, window_end)
+
+        if gantt_df.empty:
+            st.info("Nenhuma tarefa no período selecionado.")
+        else:
+            # Ordenar o DataFrame
+            df_sorted = gantt_df.sort_values(by=sort_option)
+        
+            # Definir a coluna de cores
+            color_by = "Responsável" if color_option == "Responsável" else None
         
+            # Criando gráfico com a Plotly
+            fig = px.timeline(
+                df_sorted,
+                x_start='Início',
+                x_end='Fim',
+                y='Tarefa',
+                color=color_by,
+                hover_data=['Descrição'],
+                title='Linha de Tempo de Tarefas'
+            )
+
+            # Personalizando o layout
+            fig.update_yaxes(autorange='reversed')
+            fig.update_layout(
+                height=600,
+                xaxis_title='Período',
+                yaxis_title='Tarefas',
+                hovermode='closest',
+                bargap=0.2,
+                bargroupgap=0.1
+            )
+
+            # Atualizando o template para barras mais finas
+            fig.update_traces(width=bar_thickness)
+
+            # Gantt e mapa de calor de carga de trabalho lado a lado
+            col_gantt, col_heatmap = st.columns([3, 2])
+
+            with col_gantt:
+                st.plotly_chart(fig, use_container_width=True)
+
+            with col_heatmap:
+                owners, first_day, workload = compute_workload(gantt_df, window_start, window_end)
+
+                if owners:
+                    first_date = first_day.astype(object)
+                    last_date = (first_day + workload.shape[1] - 1).astype(object)
+
+                    workload_range = st.date_input(
+                        "Período da carga de trabalho",
+                        value=(first_date, last_date),
+                        min_value=first_date,
+                        max_value=last_date,
+                        key="workload_range"
+                    )
+
+                    # Durante a seleção o intervalo pode vir incompleto
+                    if isinstance(workload_range, tuple) and len(workload_range) == 2:
+                        range_start, range_end = workload_range
+                    else:
+                        range_start, range_end = first_date, last_date
+
+                    i0 = int((np.datetime64(range_start, 'D') - first_day).astype(np.int64))
+                    i1 = int((np.datetime64(range_end, 'D') - first_day).astype(np.int64)) + 1
+
+                    heatmap = px.imshow(
+                        workload[:, i0:i1],
+                        x=pd.date_range(range_start, range_end, freq='D'),
+                        y=owners,
+                        aspect='auto',
+                        color_continuous_scale='Reds',
+                        labels=dict(x='Dia', y='Responsável', color='Tarefas'),
+                        title='Carga de Trabalho por Responsável'
+                    )
+                    heatmap.update_layout(height=600)
+
+                    st.plotly_chart(heatmap, use_container_width=True)
+                else:
+                    st.info("Não há tarefas com datas válidas para calcular a carga de trabalho.")
+
         # Mostrar detalhes ao passar o mouse
         st.info("ℹ️ Passe o mouse sobre as barras para ver mais detalhes da tarefa.")
         
@@ -636,7 +1399,7 @@ with tab1:
         
         with col2:
             st.markdown(f"**Responsável:** {selected_task['Responsável']}")
-            st.markdown(f"**Data início:** {selected_task['Início']}")
+            st.markdown(f"**Data início:** {format_date(selected_task['Início'])}")
         
         with col3:
             if st.button('📧 Enviar Lembrete'):
@@ -656,7 +1419,7 @@ with tab1:
                 if send_reminder_email(
                     selected_task['Tarefa'], 
                     selected_task['Descrição'],
-                    f"{selected_task['Início']} - {selected_task['Fim']}", 
+                    f"{format_date(selected_task['Início'])} - {format_date(selected_task['Fim'])}", 
                     email_to_use
                 ):
                     st.success('✅ Lembrete enviado com sucesso!')
@@ -704,12 +1467,15 @@ with st.expander("ℹ️ Ajuda e Instruções"):
     **1. Adicionar Tarefas:**
     - Vá para a aba "Gerenciar Tarefas"
     - Preencha o formulário com nome, descrição, datas e responsável
+    - Para tarefas que se repetem, escolha a recorrência em vez de cadastrar uma linha por ocorrência
     - Clique em "Adicionar Tarefa"
     
     **2. Visualizar Gráfico:**
     - Acesse a aba "Gráfico de Gantt"
     - Ajuste a espessura das barras com o controle deslizante
     - Passe o mouse sobre as barras para ver detalhes
+    - Use o mapa de calor ao lado para ver quantas tarefas simultâneas cada responsável tem por dia
+    - Escolha o período do gráfico para ver as ocorrências das tarefas recorrentes
     
     **3. Configurar Lembretes:**
     - Na aba "Configurações", adicione seus dados de e-mail
@@ -721,9 +1487,10 @@ with st.expander("ℹ️ Ajuda e Instruções"):
     - Edite tarefas diretamente na tabela interativa
     - Use filtros para encontrar tarefas específicas
     - Clique em "Salvar Alterações" após editar
+    - Confira a lista de "Conflitos de Agenda" para ver responsáveis com tarefas sobrepostas
     
     **Dicas:**
-    - Os dados são salvos automaticamente em um arquivo CSV
+    - Os dados são salvos automaticamente em um arquivo CSV e em um snapshot binário para carregamento rápido
     - Para receber lembretes, certifique-se de configurar corretamente seu e-mail
     - Use a pesquisa para encontrar tarefas rapidamente
     """)